@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Generate a 3-4 MB raw click logs CSV with varied, realistic query/suggestion pairs."""
-import random
-from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 # Target size in bytes (3.5 MB)
 TARGET_BYTES = 3_670_016  # ~3.5 MB
 
@@ -81,10 +82,14 @@ EXTRA_PREFIXES = [
 ]
 
 
-def random_timestamp(start_days_ago: int = 180) -> str:
-    base = datetime.now(timezone.utc)
-    delta = timedelta(days=random.randint(0, start_days_ago), seconds=random.randint(0, 86400))
-    return (base - delta).strftime("%Y-%m-%dT%H:%M:%SZ")
+ALL_PAIRS = tuple(QUERY_SUGGESTIONS + EXTRA_PREFIXES)
+POSITIONS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+POSITION_WEIGHTS = (40, 25, 15, 8, 5, 3, 2, 1, 1, 0)
+HEADER = "query,clicked_suggestion,position,timestamp\n"
+# Quotes, commas, newline and the fixed-width "%Y-%m-%dT%H:%M:%SZ" timestamp around each row
+LINE_OVERHEAD = 30
+FLUSH_BYTES = 65536
+MAX_DAYS_AGO = 180
 
 
 def main() -> None:
@@ -93,26 +98,41 @@ def main() -> None:
     raw.mkdir(parents=True, exist_ok=True)
     out_path = raw / "click_logs.csv"
 
-    all_pairs = list(QUERY_SUGGESTIONS) + list(EXTRA_PREFIXES)
-    rows = []
-    bytes_so_far = 0
-    header = "query,clicked_suggestion,position,timestamp\n"
-    bytes_so_far += len(header)
+    rng = np.random.default_rng()
+    pair_len = np.array([len(q) + len(s) for q, s in ALL_PAIRS])
+    weights = np.array(POSITION_WEIGHTS) / sum(POSITION_WEIGHTS)
+
+    # Draw enough rows to reach the target even if every line were the shortest possible,
+    # then keep the prefix whose running byte count first reaches TARGET_BYTES.
+    budget = TARGET_BYTES - len(HEADER)
+    n_max = budget // (int(pair_len.min()) + 1 + LINE_OVERHEAD) + 1
+    idx = rng.integers(0, len(ALL_PAIRS), size=n_max)
+    positions = rng.choice(POSITIONS, size=n_max, p=weights)
+    line_len = pair_len[idx] + np.where(positions >= 10, 2, 1) + LINE_OVERHEAD
+    n_rows = int(np.searchsorted(np.cumsum(line_len), budget)) + 1
+    idx, positions = idx[:n_rows], positions[:n_rows]
 
-    while bytes_so_far < TARGET_BYTES:
-        query, suggestion = random.choice(all_pairs)
-        position = random.choices([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], weights=[40, 25, 15, 8, 5, 3, 2, 1, 1, 0])[0]
-        ts = random_timestamp()
-        line = f'"{query}","{suggestion}",{position},"{ts}"\n'
-        rows.append(line)
-        bytes_so_far += len(line)
+    seconds_ago = rng.integers(0, MAX_DAYS_AGO + 1, size=n_rows) * 86400 + rng.integers(
+        0, 86400 + 1, size=n_rows
+    )
+    ts_fields = (pd.Timestamp.now(tz="UTC") - pd.to_timedelta(seconds_ago, unit="s")).strftime(
+        '"%Y-%m-%dT%H:%M:%SZ"\n'
+    )
+    # Pre-render the fixed '"query","suggestion",' and 'position,' fields once per distinct value.
+    pair_fields = np.array([f'"{q}","{s}",' for q, s in ALL_PAIRS], dtype=object)
+    position_fields = np.array([f"{p}," for p in range(max(POSITIONS) + 1)], dtype=object)
+    lines = pair_fields[idx] + position_fields[positions] + ts_fields.to_numpy(dtype=object)
 
-    with open(out_path, "w") as f:
-        f.write(header)
-        f.writelines(rows)
+    # Flush roughly every FLUSH_BYTES: one join + encode + write per block of lines.
+    ends = np.cumsum(line_len[:n_rows])
+    cuts = np.searchsorted(ends, np.arange(FLUSH_BYTES, int(ends[-1]), FLUSH_BYTES))
+    with open(out_path, "wb") as f:
+        f.write(HEADER.encode())
+        for start, stop in zip(np.r_[0, cuts], np.r_[cuts, n_rows]):
+            f.write("".join(lines[start:stop]).encode())
 
     size_mb = out_path.stat().st_size / (1024 * 1024)
-    print(f"Wrote {out_path} ({len(rows):,} rows, {size_mb:.2f} MB)")
+    print(f"Wrote {out_path} ({n_rows:,} rows, {size_mb:.2f} MB)")
 
 
 if __name__ == "__main__":
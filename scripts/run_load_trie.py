@@ -26,6 +26,17 @@ def main() -> None:
         default=root / "configs" / "api.yaml",
         help="Config YAML with redis and vocabulary_path",
     )
+    parser.add_argument(
+        "--keep-existing",
+        action="store_true",
+        help="Add to the current trie instead of deleting its keys first",
+    )
+    parser.add_argument(
+        "--export-mmap",
+        type=Path,
+        default=None,
+        help="Also write a read-only trie snapshot here (serve it with TRIE_MMAP_PATH)",
+    )
     args = parser.parse_args()
     config = load_config(args.config)
 
@@ -38,15 +49,26 @@ def main() -> None:
     key_prefix = f"{prefix}:{trie_key}"
 
     client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
-    trie = RedisTrie(client, key_prefix=key_prefix)
+    trie = RedisTrie(
+        client,
+        key_prefix=key_prefix,
+        max_prefix_len=int(redis_cfg.get("trie_max_prefix_len", 16)),
+    )
 
+    scores = None
     vocab_path = Path(config.get("vocabulary_path", "data/processed/vocabulary.parquet"))
     if not vocab_path.is_absolute():
         vocab_path = root / vocab_path
     if vocab_path.exists():
         df = pd.read_parquet(vocab_path)
         col = "query" if "query" in df.columns else df.columns[0]
-        words = df[col].astype(str).str.strip().str.lower().drop_duplicates().tolist()
+        queries = df[col].astype(str).str.strip().str.lower()
+        if "query_count" in df.columns:
+            # Rank each prefix's completions by click volume.
+            counts = df["query_count"].groupby(queries, sort=False).sum()
+            words, scores = counts.index.tolist(), counts.astype(float).tolist()
+        else:
+            words = queries.drop_duplicates().tolist()
     else:
         # Fallback: sample vocabulary for demo
         words = [
@@ -56,8 +78,14 @@ def main() -> None:
             "redis", "redis cache", "redis docker",
         ]
         print("No vocabulary.parquet found; using sample words.")
-    trie.load_bulk(words)
+    if not args.keep_existing:
+        # Full reload; also clears SET-based nodes and children keys from older trie layouts.
+        print(f"Cleared {trie.clear()} existing trie keys.")
+    trie.load_bulk(words, scores=scores)
     print(f"Loaded {len(words)} suggestions into Redis trie.")
+    if args.export_mmap is not None:
+        trie.export_mmap(args.export_mmap)
+        print(f"Exported trie snapshot to {args.export_mmap}.")
 
 
 if __name__ == "__main__":
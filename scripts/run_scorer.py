@@ -4,13 +4,12 @@ import argparse
 import sys
 from pathlib import Path
 
-import pandas as pd
 import redis
 import yaml
 
 root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(root))
-from autocomplete.scorer import load_model, score_candidates
+from autocomplete.scorer import load_model, load_query_stats, score_candidates, top_k
 from autocomplete.trie import RedisTrie
 
 
@@ -31,7 +30,11 @@ def main() -> None:
     prefix_key = f"{redis_cfg.get('prefix', 'autocomplete')}:{redis_cfg.get('trie_key_prefix', 'trie')}"
 
     client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
-    trie = RedisTrie(client, key_prefix=prefix_key)
+    trie = RedisTrie(
+        client,
+        key_prefix=prefix_key,
+        max_prefix_len=int(redis_cfg.get("trie_max_prefix_len", 16)),
+    )
 
     model_path = Path(config.get("model", {}).get("path", "models/model.joblib"))
     meta_path = Path(config.get("model", {}).get("metadata_path", "models/metadata.yaml"))
@@ -51,14 +54,10 @@ def main() -> None:
         return
 
     model, feature_cols = load_model(model_path, meta_path)
-    query_stats = {}
-    if stats_path.exists():
-        df = pd.read_parquet(stats_path)
-        query_stats = df.set_index("query").to_dict(orient="index")
+    query_stats = load_query_stats(stats_path) if stats_path.exists() else None
 
-    scored = score_candidates(model, feature_cols, prefix, candidates, query_stats)
-    scored.sort(key=lambda x: x[1], reverse=True)
-    top = scored[: args.limit]
+    texts, scores = score_candidates(model, feature_cols, prefix, candidates, query_stats)
+    top = top_k(texts, scores, args.limit)
 
     print(f"Prefix: '{prefix}' (showing top {len(top)} of {len(candidates)} candidates)\n")
     for i, (text, score) in enumerate(top, 1):
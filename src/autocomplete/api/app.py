@@ -3,19 +3,20 @@
 import json
 import os
 import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import pandas as pd
 import redis
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import RedirectResponse
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from starlette.responses import Response
 
 from autocomplete.cache import SuggestionCache
-from autocomplete.trie import RedisTrie
-from autocomplete.scorer import load_model, score_candidates
+from autocomplete.trie import MmapTrie, RedisTrie
+from autocomplete.scorer import load_model, load_query_stats, score_candidates, top_k
 
 # --- Prometheus metrics ---
 REQUEST_COUNT = Counter(
@@ -35,10 +36,59 @@ SUGGESTIONS_RETURNED = Histogram(
     buckets=(0, 1, 5, 10, 20, 50),
 )
 
+_redis: redis.Redis | None = None
+_trie: RedisTrie | MmapTrie | None = None
+_cache: SuggestionCache | None = None
+_model = None
+_model_features: list[str] = []
+_query_stats: pd.DataFrame | None = None
+
+
+def _init_services() -> None:
+    """Create the Redis-backed trie and cache and load the model (if present) once."""
+    global _redis, _trie, _cache, _model, _model_features, _query_stats
+    host = os.getenv("REDIS_HOST", "localhost")
+    port = int(os.getenv("REDIS_PORT", "6379"))
+    db = int(os.getenv("REDIS_DB", "0"))
+    _redis = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+    mmap_path = os.getenv("TRIE_MMAP_PATH")
+    if mmap_path:
+        # Read-only snapshot from RedisTrie.export_mmap: completions without a Redis round-trip.
+        _trie = MmapTrie(mmap_path)
+    else:
+        _trie = RedisTrie(
+            _redis,
+            key_prefix=os.getenv("REDIS_TRIE_PREFIX", "autocomplete:trie"),
+            max_prefix_len=int(os.getenv("TRIE_MAX_PREFIX_LEN", "16")),
+        )
+    _cache = SuggestionCache(
+        _redis,
+        key_prefix=os.getenv("REDIS_CACHE_PREFIX", "autocomplete:cache"),
+        ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "3600")),
+    )
+
+    model_path = Path(os.getenv("MODEL_PATH", "models/model.joblib"))
+    meta_path = Path(os.getenv("METADATA_PATH", "models/metadata.yaml"))
+    if not model_path.exists():
+        _model, _model_features, _query_stats = None, [], None  # trie-only ranking
+        return
+    _model, _model_features = load_model(model_path, meta_path)
+    stats_path = Path(os.getenv("QUERY_STATS_PATH", "data/processed/query_stats.parquet"))
+    _query_stats = load_query_stats(stats_path) if stats_path.exists() else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services at startup so the first request does not pay for model loading."""
+    _init_services()
+    yield
+
+
 app = FastAPI(
     title="Autocomplete Search API",
     description="ML-ranked suggestions with Redis trie and cache",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -53,56 +103,17 @@ def validation_exception_handler(request, exc: RequestValidationError):
         media_type="application/json",
     )
 
-_redis: redis.Redis | None = None
-_trie: RedisTrie | None = None
-_cache: SuggestionCache | None = None
-_model = None
-_model_features: list[str] = []
-_query_stats: dict = {}
-
-
-def _get_redis() -> redis.Redis:
-    global _redis
-    if _redis is None:
-        host = os.getenv("REDIS_HOST", "localhost")
-        port = int(os.getenv("REDIS_PORT", "6379"))
-        db = int(os.getenv("REDIS_DB", "0"))
-        _redis = redis.Redis(host=host, port=port, db=db, decode_responses=True)
-    return _redis
-
-
-def _get_trie() -> RedisTrie:
-    global _trie
-    if _trie is None:
-        prefix = os.getenv("REDIS_TRIE_PREFIX", "autocomplete:trie")
-        _trie = RedisTrie(_get_redis(), key_prefix=prefix)
-    return _trie
-
-
-def _get_cache() -> SuggestionCache:
-    global _cache
-    if _cache is None:
-        prefix = os.getenv("REDIS_CACHE_PREFIX", "autocomplete:cache")
-        ttl = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
-        _cache = SuggestionCache(_get_redis(), key_prefix=prefix, ttl_seconds=ttl)
-    return _cache
-
-
-def _get_model():
-    global _model, _model_features, _query_stats
-    if _model is None:
-        model_path = Path(os.getenv("MODEL_PATH", "models/model.joblib"))
-        meta_path = Path(os.getenv("METADATA_PATH", "models/metadata.yaml"))
-        if not model_path.exists():
-            raise FileNotFoundError(f"Model not found: {model_path}")
-        _model, _model_features = load_model(model_path, meta_path)
-        stats_path = Path(os.getenv("QUERY_STATS_PATH", "data/processed/query_stats.parquet"))
-        if stats_path.exists():
-            df = pd.read_parquet(stats_path)
-            _query_stats = df.set_index("query").to_dict(orient="index")
-        else:
-            _query_stats = {}
-    return _model, _model_features, _query_stats
+
+@app.middleware("http")
+async def record_suggest_latency(request: Request, call_next):
+    """Time each request end to end; only handlers that set request.state.cache_hit are recorded."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    cache_hit = getattr(request.state, "cache_hit", None)
+    if cache_hit is not None:
+        REQUEST_LATENCY.labels(cache_hit=cache_hit).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(cache_hit=cache_hit).inc()
+    return response
 
 
 @app.get("/", include_in_schema=False)
@@ -120,13 +131,10 @@ def health() -> dict:
 def ready() -> dict:
     """Readiness: Redis and model (if required) are available."""
     try:
-        _get_redis().ping()
+        _redis.ping()
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Redis: {e}")
-    try:
-        _get_model()
-    except FileNotFoundError:
-        pass  # model optional for readiness if we allow trie-only
+    # model optional for readiness if we allow trie-only
     return {"status": "ready"}
 
 
@@ -138,6 +146,7 @@ def metrics() -> Response:
 
 @app.get("/suggest")
 def suggest(
+    request: Request,
     q: str = Query(..., min_length=1, example="wea", description="Search prefix (e.g. wea, pyt)"),
     limit: int = Query(10, ge=1, le=20, example=5, description="Max suggestions to return"),
 ) -> dict:
@@ -145,36 +154,29 @@ def suggest(
     prefix = (q or "").strip().lower()
     if not prefix:
         raise HTTPException(status_code=400, detail="Query param 'q' must be a non-empty prefix (e.g. q=wea)")
-    cache = _get_cache()
-    cached = cache.get(prefix)
+    cached = _cache.get(prefix)
     if cached is not None:
-        REQUEST_COUNT.labels(cache_hit="true").inc()
-        start = time.perf_counter()
+        request.state.cache_hit = "true"
         out = {"query": prefix, "suggestions": cached[:limit], "cached": True}
-        REQUEST_LATENCY.labels(cache_hit="true").observe(time.perf_counter() - start)
         SUGGESTIONS_RETURNED.observe(len(out["suggestions"]))
         return out
 
-    REQUEST_COUNT.labels(cache_hit="false").inc()
-    start = time.perf_counter()
-    trie = _get_trie()
-    raw = trie.prefix_completions(prefix, limit=limit * 3)
+    request.state.cache_hit = "false"
+    raw = _trie.prefix_completions(prefix, limit=limit * 3)
     if not raw:
         out = {"query": prefix, "suggestions": [], "cached": False}
-        cache.set(prefix, [])
-        REQUEST_LATENCY.labels(cache_hit="false").observe(time.perf_counter() - start)
+        _cache.set(prefix, [])
         SUGGESTIONS_RETURNED.observe(0)
         return out
 
-    try:
-        model, feature_cols, query_stats = _get_model()
-        scored = score_candidates(model, feature_cols, prefix, raw, query_stats)
-        scored.sort(key=lambda x: x[1], reverse=True)
-        suggestions = [{"text": s[0], "score": round(s[1], 4)} for s in scored[:limit]]
-    except FileNotFoundError:
+    if _model is not None:
+        texts, scores = score_candidates(_model, _model_features, prefix, raw, _query_stats)
+        suggestions = [
+            {"text": text, "score": round(score, 4)} for text, score in top_k(texts, scores, limit)
+        ]
+    else:
         suggestions = [{"text": s, "score": 1.0} for s in raw[:limit]]
 
-    cache.set(prefix, suggestions)
-    REQUEST_LATENCY.labels(cache_hit="false").observe(time.perf_counter() - start)
+    _cache.set(prefix, suggestions)
     SUGGESTIONS_RETURNED.observe(len(suggestions))
     return {"query": prefix, "suggestions": suggestions, "cached": False}
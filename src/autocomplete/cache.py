@@ -1,41 +1,94 @@
 """Redis hot/cold cache for suggestion results."""
 
-import json
+import hashlib
 from typing import Any
 
+import orjson
 import redis
 
 
 class SuggestionCache:
-    """Cache suggestion results: key = cache:prefix:<normalized_prefix>, value = JSON list of suggestions."""
+    """Cache suggestion results: key = cache:prefix:<normalized_prefix>, value = JSON list of suggestions.
+
+    Prefixes are used as given: callers normalize once at the edge (strip + lower, as /suggest does)
+    so the hot path does not re-normalize on every get/set.
+
+    With hash_keys_over set, normalized prefixes longer than that many bytes are keyed by a 64-bit
+    blake2b fingerprint instead, and the value stores the raw prefix so a colliding entry is
+    treated as a miss rather than served for the wrong prefix.
+    """
 
     def __init__(
         self,
         client: redis.Redis,
         key_prefix: str = "autocomplete:cache",
         ttl_seconds: int = 3600,
+        hash_keys_over: int | None = None,
     ) -> None:
         self.client = client
         self.prefix = key_prefix.rstrip(":")
         self.ttl = ttl_seconds
+        self._hash_keys_over = hash_keys_over
+        self._key_prefix_b = f"{self.prefix}:".encode()
 
-    def _key(self, prefix: str) -> str:
-        return f"{self.prefix}:{prefix.strip().lower()}"
+    def _entry(self, prefix: str) -> tuple[bytes, str | None]:
+        """Return (redis key, prefix to verify in the value, or None when the key is not hashed)."""
+        raw = prefix.encode()
+        if self._hash_keys_over is not None and len(raw) > self._hash_keys_over:
+            digest = hashlib.blake2b(raw, digest_size=8).hexdigest().encode()
+            return self._key_prefix_b + digest, prefix
+        return self._key_prefix_b + raw, None
 
-    def get(self, prefix: str) -> list[dict[str, Any]] | None:
-        """Return cached suggestions or None if miss."""
-        raw = self.client.get(self._key(prefix))
+    def _key(self, prefix: str) -> bytes:
+        return self._entry(prefix)[0]
+
+    @staticmethod
+    def _encode(suggestions: list[dict[str, Any]], check: str | None) -> bytes:
+        if check is None:
+            return orjson.dumps(suggestions)
+        return orjson.dumps({"prefix": check, "suggestions": suggestions})
+
+    @staticmethod
+    def _decode(raw: str | bytes | None, check: str | None) -> list[dict[str, Any]] | None:
         if raw is None:
             return None
         try:
-            return json.loads(raw)
-        except (json.JSONDecodeError, TypeError):
+            value = orjson.loads(raw)
+        except (orjson.JSONDecodeError, TypeError):
             return None
+        if check is None:
+            return value
+        if not isinstance(value, dict) or value.get("prefix") != check:
+            return None
+        return value.get("suggestions")
+
+    def get(self, prefix: str) -> list[dict[str, Any]] | None:
+        """Return cached suggestions or None if miss."""
+        key, check = self._entry(prefix)
+        return self._decode(self.client.get(key), check)
+
+    def mget(self, prefixes: list[str]) -> list[list[dict[str, Any]] | None]:
+        """Return cached suggestions for many prefixes in one MGET round-trip (None per miss)."""
+        if not prefixes:
+            return []
+        entries = [self._entry(p) for p in prefixes]
+        raws = self.client.mget([key for key, _ in entries])
+        return [self._decode(raw, check) for raw, (_, check) in zip(raws, entries)]
 
     def set(self, prefix: str, suggestions: list[dict[str, Any]]) -> None:
         """Cache suggestions for the prefix."""
-        key = self._key(prefix)
-        self.client.setex(key, self.ttl, json.dumps(suggestions))
+        key, check = self._entry(prefix)
+        self.client.setex(key, self.ttl, self._encode(suggestions, check))
+
+    def set_many(self, items: dict[str, list[dict[str, Any]]]) -> None:
+        """Cache suggestions for many prefixes in one non-transactional pipeline round-trip."""
+        if not items:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for prefix, suggestions in items.items():
+            key, check = self._entry(prefix)
+            pipe.setex(key, self.ttl, self._encode(suggestions, check))
+        pipe.execute()
 
     def delete(self, prefix: str) -> None:
         """Invalidate cache for a prefix."""
@@ -0,0 +1,55 @@
+"""YAML config loading with a JSON sidecar cache."""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
+
+def _sidecar_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".json")
+
+
+def load_yaml(path: str | Path) -> Any:
+    """Parse a YAML file, reusing <file>.yaml.json when it was written for the same mtime.
+
+    The sidecar records the source mtime_ns, so any edit to the YAML forces a re-parse.
+    Data that does not round-trip through JSON, or a failed write, only skips caching.
+    """
+    path = Path(path)
+    mtime_ns = path.stat().st_mtime_ns
+    cache = _sidecar_path(path)
+    try:
+        with open(cache, "rb") as f:
+            cached = json.load(f)
+        if cached.get("mtime_ns") == mtime_ns:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    with open(path) as f:
+        data = yaml.load(f, Loader=_SafeLoader)
+
+    try:
+        text = json.dumps({"mtime_ns": mtime_ns, "data": data})
+        if json.loads(text)["data"] != data:  # e.g. non-string keys would not round-trip
+            return data
+        fd, tmp = tempfile.mkstemp(dir=cache.parent, prefix=cache.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp, cache)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (OSError, TypeError, ValueError):
+        pass
+    return data
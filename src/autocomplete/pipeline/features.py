@@ -1,9 +1,64 @@
 """Generate features from click logs for ML and trie vocabulary."""
 
-import random
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def _str_len(col: pd.Series) -> np.ndarray:
+    """Character lengths of a string column via Arrow's utf8_length kernel (nulls count as 0)."""
+    arr = pa.array(col)
+    if pa.types.is_dictionary(arr.type):
+        arr = arr.dictionary_decode()
+    return pc.fill_null(pc.utf8_length(arr), 0).to_numpy().astype(np.int64)
+
+
+def _matching_positions(left: pd.Series, right: pd.Series) -> np.ndarray:
+    """Count positions where two string columns hold the same character, compared in C."""
+    if left.empty:
+        return np.zeros(0, dtype=np.int64)
+    maxlen = int(max(left.str.len().max(), right.str.len().max(), 1))
+    # Fixed-width unicode arrays are NUL-padded; view each as an (n, maxlen) grid of code points.
+    a = left.to_numpy(dtype=f"U{maxlen}").view(np.uint32).reshape(len(left), maxlen)
+    b = right.to_numpy(dtype=f"U{maxlen}").view(np.uint32).reshape(len(right), maxlen)
+    # Padding is excluded so only positions present in both strings count (zip semantics).
+    return ((a == b) & (a != 0)).sum(axis=1)
+
+
+def lookup_rows(index: pd.Index, keys: Iterable, values: np.ndarray, fill: float) -> np.ndarray:
+    """Rows of values for each key's position in index; keys missing from index get fill.
+
+    One hash lookup for all keys; only hits are gathered, since get_indexer's -1 would
+    otherwise index the last row (or fail on an empty table).
+    """
+    idx = index.get_indexer(keys)
+    found = idx >= 0
+    out = np.full((len(idx), values.shape[1]), fill, dtype=values.dtype)
+    out[found] = values[idx[found]]
+    return out
+
+
+def _sample_negatives(
+    forbidden_idx: np.ndarray,
+    vocab_size: int,
+    neg_per_pos: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Draw (len(forbidden_idx), neg_per_pos) vocabulary indices, never a row's forbidden index.
+
+    Rows with forbidden index -1 (suggestion not in vocabulary) sample from the full vocabulary.
+    Other rows draw from the vocab_size - 1 allowed slots and shift past the forbidden one, so
+    every index is uniform over the allowed set without any rejection loop.
+    """
+    has_forbidden = forbidden_idx >= 0
+    high = np.where(has_forbidden, vocab_size - 1, vocab_size)
+    idx = rng.integers(0, high[:, None], size=(len(forbidden_idx), neg_per_pos))
+    idx += has_forbidden[:, None] & (idx >= forbidden_idx[:, None])
+    return idx
 
 
 class FeatureEngineer:
@@ -40,53 +95,51 @@ class FeatureEngineer:
         cutoff = datetime.now(timezone.utc) - timedelta(days=self._time_decay_days)
         return pd.Timestamp(cutoff)
 
-    def build_query_stats(self, logs: pd.DataFrame) -> pd.DataFrame:
-        """Aggregate per-query stats: count, clicks, CTR, position stats."""
-        logs = logs.copy()
-        cutoff = self._cutoff_timestamp()
-        if cutoff is not None:
-            logs = logs[logs["timestamp"] >= cutoff]
+    def build_query_stats(self, logs: pd.DataFrame | Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """Aggregate per-query stats: count, clicks, CTR, position stats.
 
-        agg = (
-            logs.groupby("clicked_suggestion", as_index=False)
-            .agg(
-                query_count=("query", "count"),
+        logs may be one DataFrame or an iterable of chunks (e.g. ClickLogsLoader.iter_load);
+        chunks are reduced to running per-suggestion counts and position sums, and the derived
+        stats are computed once at the end.
+        """
+        cutoff = self._cutoff_timestamp()
+        chunks = [logs] if isinstance(logs, pd.DataFrame) else logs
+        partials = []
+        for chunk in chunks:
+            if cutoff is not None:
+                chunk = chunk.loc[chunk["timestamp"] >= cutoff]
+            partial = chunk.groupby("clicked_suggestion", observed=True).agg(
+                query_count=("query", "size"),
                 sum_position=("position", "sum"),
-                mean_position=("position", "mean"),
             )
-            .rename(columns={"clicked_suggestion": "query"})
-        )
-        agg["ctr_approx"] = 1.0 / (agg["mean_position"].clip(lower=1) + 1)
-        return agg
+            partials.append(partial.astype({"sum_position": "int64"}))
+        if not partials:
+            return pd.DataFrame(
+                columns=["query", "query_count", "sum_position", "mean_position", "ctr_approx"]
+            )
+
+        agg = partials[0] if len(partials) == 1 else pd.concat(partials).groupby(level=0).sum()
+        mean = agg["sum_position"].to_numpy() / agg["query_count"].to_numpy()
+        agg["mean_position"] = mean
+        agg["ctr_approx"] = 1.0 / (np.maximum(mean, 1.0) + 1.0)
+        return agg.rename_axis("query").reset_index()
 
     def _add_feature_columns(
         self,
-        logs: pd.DataFrame,
-        right_clicked: pd.DataFrame,
-        right_prefix: pd.DataFrame,
-        clicked_value: int,
+        df: pd.DataFrame,
+        query_stats: pd.DataFrame,
     ) -> pd.DataFrame:
-        """Add merged stats and derived features; set clicked to clicked_value."""
-        df = logs.merge(
-            right_clicked,
-            left_on="clicked_suggestion",
-            right_on="query",
-            how="left",
-        )
-        df = df.drop(columns=["query_y"], errors="ignore")
-        df = df.rename(columns={"query_x": "query"})
-        df = df.merge(right_prefix, on="query", how="left")
-        df["clicked"] = clicked_value
-        df["query_len"] = df["query"].str.len()
-        df["suggestion_len"] = df["clicked_suggestion"].str.len()
-        df["prefix_match_len"] = df.apply(
-            lambda r: sum(
-                1
-                for a, b in zip(str(r["query"]), str(r["clicked_suggestion"]))
-                if a == b
-            ),
-            axis=1,
-        )
+        """Add clicked_/prefix_ stats and derived features to labelled rows, in place."""
+        stats = query_stats.set_index("query")
+        values = stats.to_numpy(dtype=np.float64)
+        # One hash lookup per key column, then every stat column is a take from the same block.
+        for side, keys in (("clicked", df["clicked_suggestion"]), ("prefix", df["query"])):
+            block = lookup_rows(stats.index, keys, values, np.nan)
+            for i, col in enumerate(stats.columns):
+                df[f"{side}_{col}"] = block[:, i]
+        df["query_len"] = _str_len(df["query"])
+        df["suggestion_len"] = _str_len(df["clicked_suggestion"])
+        df["prefix_match_len"] = _matching_positions(df["query"], df["clicked_suggestion"])
         return df
 
     def build_features(
@@ -95,61 +148,54 @@ class FeatureEngineer:
         query_stats: pd.DataFrame,
     ) -> pd.DataFrame:
         """Build training features: positives (clicked=1) and negative samples (clicked=0)."""
-        logs = logs.copy()
         cutoff = self._cutoff_timestamp()
         if cutoff is not None:
-            logs = logs[logs["timestamp"] >= cutoff]
-
-        right_clicked = query_stats.rename(
-            columns={c: f"clicked_{c}" for c in query_stats.columns if c != "query"}
-        )
-        right_prefix = query_stats.rename(
-            columns={c: f"prefix_{c}" for c in query_stats.columns if c != "query"}
-        )
-
-        positives = self._add_feature_columns(
-            logs[["query", "clicked_suggestion", "position"]].copy(),
-            right_clicked,
-            right_prefix,
-            clicked_value=1,
-        )
-
-        vocabulary = query_stats["query"].tolist()
-        if len(vocabulary) < 2 or self._neg_per_pos < 1:
-            existing = [c for c in self.FEATURE_COLUMNS if c in positives.columns]
-            out_cols = ["query", "clicked_suggestion", "clicked"] + existing
-            return positives[[c for c in out_cols if c in positives.columns]].fillna(0)
-
-        rng = random.Random(self._random_state)
-        neg_rows = []
-        for _, row in positives.iterrows():
-            others = [s for s in vocabulary if s != row["clicked_suggestion"]]
-            if not others:
-                continue
-            for _ in range(self._neg_per_pos):
-                other = rng.choice(others)
-                neg_rows.append({
-                    "query": row["query"],
-                    "clicked_suggestion": other,
-                    "position": 0,
-                })
-        if not neg_rows:
-            existing = [c for c in self.FEATURE_COLUMNS if c in positives.columns]
-            out_cols = ["query", "clicked_suggestion", "clicked"] + existing
-            return positives[[c for c in out_cols if c in positives.columns]].fillna(0)
-
-        negatives = self._add_feature_columns(
-            pd.DataFrame(neg_rows),
-            right_clicked,
-            right_prefix,
-            clicked_value=0,
-        )
-        combined = pd.concat([positives, negatives], ignore_index=True)
-        combined = combined.sample(frac=1, random_state=self._random_state)
-
+            logs = logs.loc[logs["timestamp"] >= cutoff]
+
+        positives = logs[["query", "clicked_suggestion", "position"]]
+        vocab_arr = query_stats["query"].to_numpy(dtype=object)
+        n_pos = len(positives)
+        if len(vocab_arr) < 2 or self._neg_per_pos < 1 or n_pos == 0:
+            rows = positives.assign(clicked=1)
+        else:
+            rng = np.random.default_rng(self._random_state)
+            forbidden_idx = pd.Index(vocab_arr).get_indexer(positives["clicked_suggestion"])
+            neg_idx = _sample_negatives(forbidden_idx, len(vocab_arr), self._neg_per_pos, rng)
+
+            # Positives fill [:n_pos], negatives [n_pos:]; one permutation replaces concat + shuffle.
+            n = n_pos + neg_idx.size
+            query_arr = np.empty(n, dtype=object)
+            clicked_arr = np.empty(n, dtype=object)
+            position_arr = np.zeros(n, dtype=np.int64)
+            label_arr = np.zeros(n, dtype=np.int64)
+            pos_queries = positives["query"].to_numpy(dtype=object)
+            query_arr[:n_pos] = pos_queries
+            query_arr[n_pos:] = np.repeat(pos_queries, self._neg_per_pos)
+            clicked_arr[:n_pos] = positives["clicked_suggestion"].to_numpy(dtype=object)
+            clicked_arr[n_pos:] = vocab_arr[neg_idx.ravel()]
+            position_arr[:n_pos] = positives["position"].to_numpy()
+            label_arr[:n_pos] = 1
+
+            perm = rng.permutation(n)
+            rows = pd.DataFrame({
+                "query": query_arr[perm],
+                "clicked_suggestion": clicked_arr[perm],
+                "position": position_arr[perm],
+                "clicked": label_arr[perm],
+            })
+
+        combined = self._add_feature_columns(rows, query_stats)
         existing = [c for c in self.FEATURE_COLUMNS if c in combined.columns]
-        out_cols = ["query", "clicked_suggestion", "clicked"] + existing
-        return combined[[c for c in out_cols if c in combined.columns]].fillna(0)
+        # One contiguous float32 block for the model instead of mixed int/float columns.
+        feat = np.empty((len(combined), len(existing)), dtype=np.float32)
+        for i, col in enumerate(existing):
+            feat[:, i] = combined[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        np.nan_to_num(feat, copy=False)
+        out = pd.DataFrame(feat, columns=existing, copy=False)
+        out.insert(0, "clicked", combined["clicked"].to_numpy())
+        out.insert(0, "clicked_suggestion", combined["clicked_suggestion"].to_numpy())
+        out.insert(0, "query", combined["query"].to_numpy())
+        return out
 
     def filter_vocabulary(
         self,
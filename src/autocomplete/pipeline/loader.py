@@ -1,8 +1,50 @@
 """Load and normalize click logs."""
 
+from collections.abc import Iterator
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+# Fast path for the documented log format; anything else goes through the tolerant fallback.
+_ISO_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_NUMBER_RE = r"^[+-]?(\d+\.?\d*|\.\d+)$"
+
+
+def _normalize_text(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Trim and lowercase; blank or whitespace-only values become null."""
+    text = pc.utf8_lower(pc.utf8_trim_whitespace(col))
+    return pc.if_else(pc.equal(pc.utf8_length(text), 0), pa.scalar(None, pa.string()), text)
+
+
+def _parse_position(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Numeric strings to int32 (truncating decimals); missing or malformed values become 0."""
+    text = pc.utf8_trim_whitespace(col)
+    numeric = pc.if_else(
+        pc.match_substring_regex(text, _NUMBER_RE), text, pa.scalar(None, pa.string())
+    )
+    return pc.fill_null(pc.cast(pc.cast(numeric, pa.float64()), pa.int32(), safe=False), 0)
+
+
+def _parse_timestamp(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """ISO 8601 (naive means UTC) or unix seconds to timestamp[us, UTC]; unparseable -> null."""
+    text = pc.utf8_trim_whitespace(col)
+    parsed = pc.cast(
+        pc.strptime(text, format=_ISO_UTC_FORMAT, unit="us", error_is_null=True), _TIMESTAMP
+    )
+    missing = pc.and_(pc.is_null(parsed), pc.is_valid(text))
+    if not pc.any(missing).as_py():
+        return parsed
+    rest = text.filter(missing).to_pandas()
+    unix = pd.to_numeric(rest, errors="coerce")
+    ts = pd.to_datetime(rest.where(unix.isna()), errors="coerce", utc=True, format="ISO8601")
+    ts = ts.fillna(pd.to_datetime(unix, unit="s", utc=True, errors="coerce"))
+    fallback = pc.cast(pa.array(ts), _TIMESTAMP)
+    return pc.replace_with_mask(parsed.combine_chunks(), missing.combine_chunks(), fallback)
 
 
 class ClickLogsLoader:
@@ -25,40 +67,77 @@ class ClickLogsLoader:
         self._position_col = position_col
         self._timestamp_col = timestamp_col
 
-    def load(self, path: str | Path) -> pd.DataFrame:
-        """Load click logs from path and return normalized DataFrame."""
-        path = Path(path)
-        if not path.exists():
-            raise FileNotFoundError(f"Click logs not found: {path}")
+    def _convert_options(self) -> pacsv.ConvertOptions:
+        # Read as strings (empty -> null) and convert position/timestamp tolerantly in
+        # _normalize: one malformed row must not fail a whole multi-GB load.
+        return pacsv.ConvertOptions(
+            column_types={
+                self._query_col: pa.string(),
+                self._clicked_col: pa.string(),
+                self._position_col: pa.string(),
+                self._timestamp_col: pa.string(),
+            },
+            strings_can_be_null=True,
+        )
 
-        df = pd.read_csv(path)
+    def _check_columns(self, names: list[str]) -> None:
         required = {
             self._query_col,
             self._clicked_col,
             self._position_col,
             self._timestamp_col,
         }
-        missing = required - set(df.columns)
+        missing = required - set(names)
         if missing:
             raise ValueError(f"Missing columns: {missing}")
 
-        df = df.rename(
-            columns={
-                self._query_col: "query",
-                self._clicked_col: "clicked_suggestion",
-                self._position_col: "position",
-                self._timestamp_col: "timestamp",
-            }
-        )
+    def _normalize(self, tbl: pa.Table) -> pd.DataFrame:
+        """Rename to the standard schema, normalize text in Arrow kernels, convert to pandas."""
+        rename = {
+            self._query_col: "query",
+            self._clicked_col: "clicked_suggestion",
+            self._position_col: "position",
+            self._timestamp_col: "timestamp",
+        }
+        tbl = tbl.rename_columns([rename.get(c, c) for c in tbl.column_names])
+        for name, values in (
+            ("query", _normalize_text(tbl["query"])),
+            ("clicked_suggestion", _normalize_text(tbl["clicked_suggestion"])),
+            ("position", _parse_position(tbl["position"])),
+            ("timestamp", _parse_timestamp(tbl["timestamp"])),
+        ):
+            tbl = tbl.set_column(tbl.schema.get_field_index(name), name, values)
+        tbl = tbl.filter(pc.and_(pc.is_valid(tbl["query"]), pc.is_valid(tbl["timestamp"])))
+        df = tbl.to_pandas()
+        # Few distinct strings over many rows: int codes make merges and groupbys cheaper.
+        df["query"] = df["query"].astype("category")
+        df["clicked_suggestion"] = df["clicked_suggestion"].astype("category")
+        return df
 
-        df["query"] = df["query"].astype(str).str.strip().str.lower()
-        df["clicked_suggestion"] = (
-            df["clicked_suggestion"].astype(str).str.strip().str.lower()
+    def load(self, path: str | Path) -> pd.DataFrame:
+        """Load click logs from path and return normalized DataFrame."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Click logs not found: {path}")
+
+        tbl = pacsv.read_csv(path, convert_options=self._convert_options())
+        self._check_columns(tbl.column_names)
+        return self._normalize(tbl)
+
+    def iter_load(self, path: str | Path, block_size: int = 1 << 24) -> Iterator[pd.DataFrame]:
+        """Stream click logs as normalized DataFrames of roughly block_size bytes of CSV each."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Click logs not found: {path}")
+
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=block_size),
+            convert_options=self._convert_options(),
         )
-        df["position"] = pd.to_numeric(df["position"], errors="coerce").fillna(0).astype(int)
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-        df = df.dropna(subset=["query", "timestamp"])
-        return df
+        self._check_columns(reader.schema.names)
+        for batch in reader:
+            yield self._normalize(pa.Table.from_batches([batch]))
 
 
 def load_click_logs(
@@ -1,24 +1,68 @@
 """Load model and score candidate suggestions."""
 
+import functools
+import threading
 from pathlib import Path
 from typing import Any
 
 import joblib
+import numpy as np
 import pandas as pd
-import yaml
+
+from autocomplete.config import load_yaml
+from autocomplete.pipeline.features import FeatureEngineer, lookup_rows
+
+STAT_COLUMNS = ["query_count", "sum_position", "mean_position", "ctr_approx"]
+
+# Per-thread feature buffer reused across score_candidates calls.
+_TLS = threading.local()
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _load_cached(
+    model_path: str,
+    model_mtime: int | None,
+    meta_path: str,
+    meta_mtime: int | None,
+) -> tuple[Any, tuple[str, ...]]:
+    # Arrays in the pickle are memory-mapped read-only rather than copied into the heap, so
+    # forked workers share the pages. Training replaces model.joblib atomically, which keeps
+    # an older mapping valid until the model is reloaded.
+    model = joblib.load(model_path, mmap_mode="r")
+    feature_cols: tuple[str, ...] = ()
+    if meta_mtime is not None:
+        meta = load_yaml(meta_path) or {}
+        feature_cols = tuple(meta.get("feature_columns", []))
+    return model, feature_cols
 
 
 def load_model(model_path: str | Path, metadata_path: str | Path | None = None) -> tuple[Any, list[str]]:
-    """Load joblib model and feature column list."""
+    """Load joblib model and feature column list.
+
+    Memoized on the paths and their mtimes, so repeated calls are a dict lookup and a
+    retrained model (new mtime) is picked up on the next call.
+    """
     model_path = Path(model_path)
     meta_path = Path(metadata_path or model_path.parent / "metadata.yaml")
-    model = joblib.load(model_path)
-    feature_cols = []
-    if meta_path.exists():
-        with open(meta_path) as f:
-            meta = yaml.safe_load(f) or {}
-        feature_cols = meta.get("feature_columns", [])
-    return model, feature_cols
+    model, feature_cols = _load_cached(
+        str(model_path), _mtime_ns(model_path), str(meta_path), _mtime_ns(meta_path)
+    )
+    return model, list(feature_cols)
+
+
+def load_query_stats(stats_path: str | Path) -> pd.DataFrame:
+    """Load query_stats parquet as a DataFrame indexed by query, for score_candidates lookups."""
+    df = pd.read_parquet(stats_path)
+    stats = df.astype({"query": str}).set_index("query").reindex(columns=STAT_COLUMNS)
+    # Rebuild from one array so the frame is a single float32 block (see score_candidates).
+    return pd.DataFrame(stats.to_numpy(dtype=np.float32), index=stats.index, columns=STAT_COLUMNS)
 
 
 def score_candidates(
@@ -26,33 +70,67 @@ def score_candidates(
     feature_columns: list[str],
     prefix: str,
     candidates: list[str],
-    query_stats: dict[str, dict[str, float]] | None = None,
-) -> list[tuple[str, float]]:
-    """Score candidate suggestions for a prefix. query_stats: suggestion -> {query_count, mean_position, ...}."""
+    query_stats: pd.DataFrame | None = None,
+) -> tuple[list[str], np.ndarray]:
+    """Score candidate suggestions for a prefix; returns (candidates, scores) as parallel sequences.
+    query_stats: DataFrame indexed by suggestion with query_count, sum_position, mean_position,
+    ctr_approx (see load_query_stats)."""
     if not candidates:
-        return []
-    query_stats = query_stats or {}
-    rows = []
-    for sug in candidates:
-        row = {
-            "query_len": len(prefix),
-            "suggestion_len": len(sug),
-            "prefix_match_len": sum(1 for a, b in zip(prefix, sug) if a == b),
-            "position": 0,
-            "clicked_query_count": query_stats.get(sug, {}).get("query_count", 0),
-            "clicked_sum_position": query_stats.get(sug, {}).get("sum_position", 0),
-            "clicked_mean_position": query_stats.get(sug, {}).get("mean_position", 0),
-            "clicked_ctr_approx": query_stats.get(sug, {}).get("ctr_approx", 0),
-            "prefix_query_count": query_stats.get(prefix, {}).get("query_count", 0),
-            "prefix_sum_position": query_stats.get(prefix, {}).get("sum_position", 0),
-            "prefix_mean_position": query_stats.get(prefix, {}).get("mean_position", 0),
-            "prefix_ctr_approx": query_stats.get(prefix, {}).get("ctr_approx", 0),
-        }
-        for c in feature_columns:
-            if c not in row:
-                row[c] = 0
-        rows.append(row)
-    X = pd.DataFrame(rows)[feature_columns] if feature_columns else pd.DataFrame(rows)
-    X = X.reindex(columns=feature_columns, fill_value=0)
+        return [], np.empty(0)
+    n = len(candidates)
+    cols = feature_columns or FeatureEngineer.FEATURE_COLUMNS
+    col_index = {name: i for i, name in enumerate(cols)}
+    buf = getattr(_TLS, "buf", None)
+    if buf is None or buf.shape[0] < n or buf.shape[1] != len(cols):
+        rows = n if buf is None or buf.shape[1] != len(cols) else max(n, 2 * buf.shape[0])
+        buf = _TLS.buf = np.empty((rows, len(cols)), dtype=np.float32)
+    X = buf[:n]
+    X.fill(0)
+
+    def put(name: str, values: Any) -> None:
+        i = col_index.get(name)
+        if i is not None:
+            X[:, i] = values
+
+    suggestion_len = np.fromiter((len(sug) for sug in candidates), dtype=np.int32, count=n)
+    width = max(int(suggestion_len.max()), len(prefix), 1)
+    # Same matching-positions definition as training, compared over NUL-padded code points.
+    cand_cp = np.array(candidates, dtype=f"U{width}").view(np.uint32).reshape(n, width)
+    prefix_cp = np.array([prefix], dtype=f"U{width}").view(np.uint32)
+    put("query_len", len(prefix))
+    put("suggestion_len", suggestion_len)
+    put("prefix_match_len", ((cand_cp == prefix_cp) & (prefix_cp != 0)).sum(axis=1))
+
+    if query_stats is not None:
+        if list(query_stats.columns) != STAT_COLUMNS:
+            query_stats = query_stats.reindex(columns=STAT_COLUMNS)
+        # One lookup for the prefix and all candidates; frames from load_query_stats are a
+        # single float32 block, so to_numpy() is a view rather than a copy of every row.
+        # Unknown queries stay zero.
+        picked = lookup_rows(
+            query_stats.index, [prefix, *candidates], query_stats.to_numpy(dtype=np.float32), 0
+        )
+        np.nan_to_num(picked, copy=False)
+        prefix_stats, clicked = picked[0], picked[1:]
+        for i, col in enumerate(STAT_COLUMNS):
+            put(f"clicked_{col}", clicked[:, i])
+            put(f"prefix_{col}", prefix_stats[i])
+
+    # Models fitted on a DataFrame expect named columns; wrap the block without copying.
+    if getattr(model, "feature_names_in_", None) is not None:
+        X = pd.DataFrame(X, columns=cols, copy=False)
     scores = model.predict_proba(X)[:, 1] if hasattr(model, "predict_proba") else model.predict(X)
-    return list(zip(candidates, scores.tolist() if hasattr(scores, "tolist") else [float(scores)]))
+    return candidates, np.asarray(scores, dtype=float).reshape(-1)
+
+
+def top_k(candidates: list[str], scores: np.ndarray, k: int) -> list[tuple[str, float]]:
+    """Return the k best (candidate, score) pairs, highest first.
+
+    Ties keep candidate order, which the trie returns most popular first. A stable sort is
+    used because the candidate lists are small (limit * 3) and argpartition is not stable.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    idx = np.argsort(-scores, kind="stable")[:k]
+    return [(candidates[i], float(scores[i])) for i in idx]
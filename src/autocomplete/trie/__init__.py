@@ -1,5 +1,6 @@
-"""Distributed trie stored in Redis for prefix lookup."""
+"""Distributed trie stored in Redis for prefix lookup, plus a read-only mmap snapshot."""
 
+from autocomplete.trie.mmap_trie import MmapTrie, write_mmap_trie
 from autocomplete.trie.redis_trie import RedisTrie
 
-__all__ = ["RedisTrie"]
+__all__ = ["MmapTrie", "RedisTrie", "write_mmap_trie"]
@@ -0,0 +1,105 @@
+"""Read-only trie snapshot in a memory-mapped file, for serving without Redis round-trips."""
+
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+# Layout (little-endian):
+#   header: magic, n prefixes, max_prefix_len
+#   uint64[n + 1] offsets into the prefix blob
+#   uint64[n + 1] offsets into the completions blob
+#   prefix blob: UTF-8 prefixes sorted bytewise (so code-point order)
+#   completions blob: per prefix, "\n"-joined completions, most popular first
+_MAGIC = b"ACTRIE01"
+_HEADER = struct.Struct("<8sII")
+
+
+def write_mmap_trie(
+    path: str | Path,
+    nodes: Iterable[tuple[str, list[str]]],
+    max_prefix_len: int,
+) -> None:
+    """Write (prefix, completions) pairs as a MmapTrie file; replaces path atomically."""
+    encoded = sorted(
+        (prefix.encode(), "\n".join(completions).encode()) for prefix, completions in nodes
+    )
+    n = len(encoded)
+    prefix_offsets = np.zeros(n + 1, dtype="<u8")
+    completion_offsets = np.zeros(n + 1, dtype="<u8")
+    np.cumsum([len(p) for p, _ in encoded], out=prefix_offsets[1:])
+    np.cumsum([len(c) for _, c in encoded], out=completion_offsets[1:])
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n, max_prefix_len))
+        f.write(prefix_offsets.tobytes())
+        f.write(completion_offsets.tobytes())
+        f.write(b"".join(p for p, _ in encoded))
+        f.write(b"".join(c for _, c in encoded))
+    # Readers keep their mapping of the old inode; new opens see the new snapshot.
+    os.replace(tmp, path)
+
+
+class _Prefixes:
+    """Sequence view of the sorted prefix blob, for bisect."""
+
+    def __init__(self, buf: memoryview, offsets: np.ndarray) -> None:
+        self._buf = buf
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self._buf[self._offsets[i] : self._offsets[i + 1]])
+
+
+class MmapTrie:
+    """Read-only prefix lookup over a file written by write_mmap_trie / RedisTrie.export_mmap.
+
+    Same prefix_completions API as RedisTrie; lookups are a binary search over the mapped
+    prefix table, with no network round-trip.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, self.max_prefix_len = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a trie snapshot (bad magic {magic!r})")
+        pos = _HEADER.size
+        prefix_offsets = np.frombuffer(self._mm, dtype="<u8", count=n + 1, offset=pos)
+        pos += prefix_offsets.nbytes
+        self._completion_offsets = np.frombuffer(self._mm, dtype="<u8", count=n + 1, offset=pos)
+        pos += self._completion_offsets.nbytes
+        buf = memoryview(self._mm)
+        blob_start = pos + int(prefix_offsets[-1])
+        self._prefixes = _Prefixes(buf[pos:blob_start], prefix_offsets)
+        self._completions = buf[blob_start:]
+
+    def prefix_completions(self, prefix: str, limit: int = 50) -> list[str]:
+        """Return up to limit completions for prefix, most popular first."""
+        prefix = prefix.strip().lower()
+        if limit <= 0:
+            return []
+        key = prefix[: self.max_prefix_len].encode()
+        i = bisect_left(self._prefixes, key)
+        if i == len(self._prefixes) or self._prefixes[i] != key:
+            return []
+        start, end = self._completion_offsets[i], self._completion_offsets[i + 1]
+        if start == end:
+            return []
+        out = bytes(self._completions[start:end]).decode().split("\n")
+        if len(prefix) > self.max_prefix_len:
+            out = [c for c in out if c.startswith(prefix)]
+        return out[:limit]
+
+    def search_prefix(self, prefix: str, limit: int = 50) -> list[str]:
+        """Same as prefix_completions (alias)."""
+        return self.prefix_completions(prefix, limit)
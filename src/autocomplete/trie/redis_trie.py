@@ -1,66 +1,297 @@
-"""Trie stored in Redis: each node is a key, children and completions stored in sets/hashes."""
+"""Trie stored in Redis: each node is a sorted set of the completions under that path."""
 
-from typing import Iterator
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from itertools import islice
+from pathlib import Path
 
 import redis
 
+from autocomplete.trie.mmap_trie import write_mmap_trie
+
+# Bulk insert run server-side: KEYS[1] = node key prefix, ARGV[1] = max_prefix_len, then
+# (word, score) pairs with score "" meaning increment by 1. Words arrive normalized; prefixes
+# are cut on UTF-8 character boundaries so keys match the Python-side word[:i].
+_INSERT_LUA = """
+local node_prefix = KEYS[1]
+local max_len = tonumber(ARGV[1])
+for i = 2, #ARGV, 2 do
+  local w, score = ARGV[i], ARGV[i + 1]
+  local pos, chars, n = 1, 0, #w
+  while pos <= n and chars < max_len do
+    local b = string.byte(w, pos)
+    if b >= 0xF0 then pos = pos + 4 elseif b >= 0xE0 then pos = pos + 3
+    elseif b >= 0xC0 then pos = pos + 2 else pos = pos + 1 end
+    chars = chars + 1
+    local key = node_prefix .. string.sub(w, 1, pos - 1)
+    if score == "" then
+      redis.call("ZINCRBY", key, 1, w)
+    else
+      redis.call("ZADD", key, score, w)
+    end
+  end
+end
+return (#ARGV - 1) / 2
+"""
+
+
+def _glob_escape(text: str) -> str:
+    """Escape Redis glob metacharacters so text matches literally in SCAN MATCH."""
+    return "".join("\\" + ch if ch in "*?[]\\" else ch for ch in text)
+
 
 class RedisTrie:
-    """Distributed trie in Redis. Keys: trie:node:<path> -> set of completions; trie:children:<path> -> set of next chars."""
+    """Distributed trie in Redis. Keys: trie:node:<path> -> ZSET of completion -> popularity.
+
+    Scores are the popularity passed at insert time (e.g. query_count) or, without one, the
+    number of times a completion was inserted, so reads come back most popular first.
+    Node sets are only written for paths up to max_prefix_len characters; longer prefixes
+    are answered from that deepest ancestor and filtered. Child characters are not stored;
+    derive them on demand from zrange(node_key, 0, -1) as c[len(path)].
+
+    insert_many runs as one Lua script per batch of words; servers without scripting fall
+    back to pipelined commands. Lookups are mirrored in a small in-process LRU
+    (local_cache_size entries, local_cache_ttl seconds; 0 disables it). Writes through this
+    instance clear it; writes from other processes become visible once the TTL expires.
+
+    skip_seen=True keeps a RedisBloom filter (<prefix>:seen) of inserted words and skips
+    words it has already seen, for refreshes that are mostly re-inserts. Skipped words keep
+    their existing scores, a false positive (about seen_error_rate) drops a new word, and
+    words removed by delete_prefix stay marked as seen. Without RedisBloom it is ignored.
+    """
 
     def __init__(
         self,
         client: redis.Redis,
         key_prefix: str = "autocomplete:trie",
+        max_prefix_len: int = 16,
+        local_cache_size: int = 1024,
+        local_cache_ttl: float = 1.0,
+        use_lua: bool = True,
+        skip_seen: bool = False,
+        seen_error_rate: float = 0.001,
+        seen_capacity: int = 10_000_000,
     ) -> None:
         self.client = client
+        self.max_prefix_len = max_prefix_len
         self.prefix = key_prefix.rstrip(":")
+        self._node_prefix = f"{self.prefix}:node:"
+        pool = getattr(client, "connection_pool", None)
+        self._decoded = bool(getattr(pool, "connection_kwargs", {}).get("decode_responses", False))
+        # prefix -> (fetched_at, completions, limit they were fetched with)
+        self._local_cache: OrderedDict[str, tuple[float, list[str], int]] = OrderedDict()
+        self._local_cache_size = local_cache_size
+        self._local_cache_ttl = local_cache_ttl
+        self._local_lock = threading.Lock()
+        self._use_lua = use_lua
+        self._insert_script = client.register_script(_INSERT_LUA)
+        self._seen_key = f"{self.prefix}:seen"
+        self._skip_seen = skip_seen and self._reserve_seen(seen_error_rate, seen_capacity)
+
+    def _reserve_seen(self, error_rate: float, capacity: int) -> bool:
+        """Create the seen-words bloom filter; False if the server has no RedisBloom."""
+        try:
+            self.client.execute_command("BF.RESERVE", self._seen_key, error_rate, capacity)
+        except redis.ResponseError as e:
+            msg = str(e).lower()
+            if "exists" in msg:
+                return True
+            if "unknown command" in msg:
+                return False
+            raise
+        return True
+
+    def _unseen(self, batch: list[tuple[str, float | None]]) -> list[tuple[str, float | None]]:
+        """Normalize batch and drop empty words and words the bloom filter has seen."""
+        batch = [(w.strip().lower(), score) for w, score in batch]
+        batch = [(w, score) for w, score in batch if w]
+        if not batch:
+            return batch
+        flags = self.client.execute_command("BF.MEXISTS", self._seen_key, *(w for w, _ in batch))
+        return [pair for pair, seen in zip(batch, flags) if not int(seen)]
+
+    def _mark_seen(self, batch: list[tuple[str, float | None]]) -> None:
+        # Marked only after the insert succeeded, so a failed batch is retried next run.
+        if batch:
+            self.client.execute_command("BF.MADD", self._seen_key, *(w for w, _ in batch))
 
     def _node_key(self, path: str) -> str:
-        return f"{self.prefix}:node:{path}"
+        return self._node_prefix + path
 
-    def _children_key(self, path: str) -> str:
-        return f"{self.prefix}:children:{path}"
+    def _clear_local_cache(self) -> None:
+        with self._local_lock:
+            self._local_cache.clear()
 
-    def insert(self, word: str, payload: str | None = None) -> None:
-        """Insert a full suggestion. At each prefix path we store the full completion."""
+    def _add_to_pipe(
+        self,
+        pipe: redis.client.Pipeline,
+        word: str,
+        payload: str | None = None,
+        score: float | None = None,
+    ) -> int:
+        """Queue the commands that insert word on pipe; returns how many were queued (0 if empty).
+
+        With a score the completion's popularity is set to it (ZADD); without one it is
+        incremented by 1 (ZINCRBY).
+        """
         word = word.strip().lower()
         if not word:
-            return
+            return 0
         payload = payload or word
+        node_prefix = self._node_prefix
+        depth = min(len(word), self.max_prefix_len)
+        if score is None:
+            for i in range(1, depth + 1):
+                pipe.zincrby(node_prefix + word[:i], 1.0, payload)
+        else:
+            mapping = {payload: score}
+            for i in range(1, depth + 1):
+                pipe.zadd(node_prefix + word[:i], mapping)
+        return depth
+
+    def insert(self, word: str, payload: str | None = None, score: float | None = None) -> None:
+        """Insert a full suggestion. At each prefix path we store the full completion."""
+        if self._skip_seen and not self._unseen([(word, score)]):
+            return
         pipe = self.client.pipeline()
-        for i in range(1, len(word) + 1):
-            path = word[:i]
-            pipe.sadd(self._node_key(path), payload)
-            if i < len(word):
-                pipe.sadd(self._children_key(path), word[i])
-        pipe.execute()
-
-    def insert_many(self, words: list[str]) -> None:
-        """Bulk insert; more efficient than repeated insert()."""
-        for w in words:
-            self.insert(w)
+        if self._add_to_pipe(pipe, word, payload, score):
+            pipe.execute()
+            self._clear_local_cache()
+            if self._skip_seen:
+                self._mark_seen([(word.strip().lower(), score)])
+
+    def insert_many(
+        self,
+        words: Iterable[str],
+        batch_size: int = 2000,
+        scores: Iterable[float] | None = None,
+    ) -> None:
+        """Bulk insert in batches of batch_size words, one round-trip per batch.
+
+        scores, if given, runs parallel to words and sets each word's popularity.
+        """
+        pairs = zip(words, scores) if scores is not None else ((w, None) for w in words)
+        while batch := list(islice(pairs, batch_size)):
+            if self._skip_seen:
+                batch = self._unseen(batch)
+                if not batch:
+                    continue
+            if not (self._use_lua and self._insert_batch_lua(batch)):
+                pipe = self.client.pipeline(transaction=False)
+                if sum(self._add_to_pipe(pipe, w, score=score) for w, score in batch):
+                    pipe.execute()
+            if self._skip_seen:
+                self._mark_seen(batch)
+        self._clear_local_cache()
+
+    def _insert_batch_lua(self, batch: list[tuple[str, float | None]]) -> bool:
+        """Insert batch with the Lua script; False (and stop trying) if the server lacks EVAL."""
+        args: list[str | int] = [self.max_prefix_len]
+        for w, score in batch:
+            w = w.strip().lower()
+            if w:
+                args += (w, "" if score is None else repr(float(score)))
+        if len(args) == 1:
+            return True
+        try:
+            self._insert_script(keys=[self._node_prefix], args=args)
+        except redis.ResponseError as e:
+            msg = str(e).lower()
+            if "unknown command" not in msg and "scripting" not in msg:
+                raise
+            self._use_lua = False
+            return False
+        return True
 
     def prefix_completions(self, prefix: str, limit: int = 50) -> list[str]:
-        """Return completions for prefix (full strings that start with prefix)."""
+        """Return up to limit completions for prefix (full strings that start with prefix).
+
+        Results are ordered most popular first. Stored paths read the top limit with
+        ZREVRANGE; prefixes longer than max_prefix_len ZSCAN the deepest stored ancestor with
+        MATCH, so only matching members cross the wire, and rank those.
+        """
         prefix = prefix.strip().lower()
-        key = self._node_key(prefix)
-        completions = self.client.smembers(key)
-        out = [c.decode() if isinstance(c, bytes) else c for c in completions]
+        if limit <= 0:
+            return []
+        use_local = self._local_cache_ttl > 0 and self._local_cache_size > 0
+        if use_local:
+            with self._local_lock:
+                hit = self._local_cache.get(prefix)
+                # Reusable if fetched with at least this limit, or if it was the whole set.
+                if (
+                    hit is not None
+                    and time.monotonic() - hit[0] < self._local_cache_ttl
+                    and (hit[2] >= limit or len(hit[1]) < hit[2])
+                ):
+                    self._local_cache.move_to_end(prefix)
+                    return hit[1][:limit]
+
+        key = self._node_key(prefix[: self.max_prefix_len])
+        if len(prefix) > self.max_prefix_len:
+            pattern = _glob_escape(prefix) + "*"
+            matches = dict(self.client.zscan_iter(key, match=pattern, count=max(limit, 100)))
+            completions = sorted(matches, key=matches.__getitem__, reverse=True)[:limit]
+        else:
+            completions = self.client.zrevrange(key, 0, limit - 1)
+        out = list(completions) if self._decoded else [c.decode() for c in completions]
+
+        if use_local:
+            with self._local_lock:
+                self._local_cache[prefix] = (time.monotonic(), out, limit)
+                self._local_cache.move_to_end(prefix)
+                while len(self._local_cache) > self._local_cache_size:
+                    self._local_cache.popitem(last=False)
         return out[:limit]
 
     def search_prefix(self, prefix: str, limit: int = 50) -> list[str]:
         """Same as prefix_completions (alias)."""
         return self.prefix_completions(prefix, limit)
 
-    def load_bulk(self, words: list[str]) -> None:
-        """Insert many suggestions."""
-        for w in words:
-            self.insert(w)
+    def load_bulk(
+        self,
+        words: Iterable[str],
+        batch_size: int = 2000,
+        scores: Iterable[float] | None = None,
+    ) -> None:
+        """Alias of insert_many."""
+        self.insert_many(words, batch_size, scores=scores)
+
+    def clear(self, batch_size: int = 1000) -> int:
+        """Delete every node key, plus children keys left by older layouts; returns the count.
+
+        Needed before loading into a keyspace built by the SET-based trie, whose node keys
+        would otherwise fail ZADD/ZINCRBY with WRONGTYPE.
+        """
+        deleted = 0
+        for kind in ("node", "children"):
+            pattern = _glob_escape(f"{self.prefix}:{kind}:") + "*"
+            keys = self.client.scan_iter(match=pattern, count=batch_size)
+            while batch := list(islice(keys, batch_size)):
+                deleted += self.client.delete(*batch)
+        self._clear_local_cache()
+        return deleted
+
+    def export_mmap(self, path: str | Path, batch_size: int = 1000) -> None:
+        """Snapshot every node (completions most popular first) into a MmapTrie file."""
+        node_prefix = self._node_prefix
+        keys = list(self.client.scan_iter(match=_glob_escape(node_prefix) + "*", count=1000))
+        nodes = []
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start : start + batch_size]
+            pipe = self.client.pipeline(transaction=False)
+            for key in chunk:
+                pipe.zrevrange(key, 0, -1)
+            for key, members in zip(chunk, pipe.execute()):
+                if not self._decoded:
+                    key, members = key.decode(), [m.decode() for m in members]
+                nodes.append((key[len(node_prefix) :], members))
+        write_mmap_trie(path, nodes, self.max_prefix_len)
 
     def delete_prefix(self, prefix: str) -> None:
         """Remove all nodes under a prefix (use with care)."""
         prefix = prefix.strip().lower()
         # Remove completion set for this path and all longer paths (simplified: only this path)
         self.client.delete(self._node_key(prefix))
-        self.client.delete(self._children_key(prefix))
+        self._clear_local_cache()
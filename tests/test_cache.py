@@ -15,3 +15,16 @@ def test_cache_get_set(redis_client):
     assert cache.get("wea") is None
     cache.set("wea", [{"text": "weather", "score": 0.9}])
     assert cache.get("wea") == [{"text": "weather", "score": 0.9}]
+
+
+def test_cache_mget_set_many(redis_client):
+    cache = SuggestionCache(redis_client, key_prefix="test:cache", ttl_seconds=60)
+    cache.set_many({"py": [{"text": "python", "score": 0.8}], "gi": []})
+    assert cache.mget(["py", "gi", "xyz"]) == [[{"text": "python", "score": 0.8}], [], None]
+
+
+def test_cache_hashed_keys(redis_client):
+    cache = SuggestionCache(redis_client, key_prefix="test:cache", ttl_seconds=60, hash_keys_over=4)
+    cache.set("weather lon", [{"text": "weather london", "score": 0.7}])
+    assert cache.get("weather lon") == [{"text": "weather london", "score": 0.7}]
+    assert cache.get("weather new york") is None
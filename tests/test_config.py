@@ -0,0 +1,15 @@
+import os
+
+from autocomplete.config import load_yaml
+
+
+def test_load_yaml_sidecar_invalidated_on_edit(tmp_path):
+    path = tmp_path / "conf.yaml"
+    path.write_text("a: 1\nb: [x, y]\n")
+    assert load_yaml(path) == {"a": 1, "b": ["x", "y"]}
+    assert (tmp_path / "conf.yaml.json").exists()
+    assert load_yaml(path) == {"a": 1, "b": ["x", "y"]}
+    path.write_text("a: 2\n")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert load_yaml(path) == {"a": 2}
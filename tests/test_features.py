@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from autocomplete.pipeline.features import FeatureEngineer
+from autocomplete.pipeline.loader import ClickLogsLoader
+
+
+@pytest.fixture
+def logs():
+    now = pd.Timestamp(datetime.now(timezone.utc))
+    return pd.DataFrame({
+        "query": ["wea", "wea", "pyt", "git", "git"],
+        "clicked_suggestion": ["weather", "weather london", "python", "github", "github"],
+        "position": [1, 2, 1, 3, 1],
+        "timestamp": [now] * 5,
+    })
+
+
+def test_build_features_negatives(logs):
+    engineer = FeatureEngineer(time_decay_days=0, neg_per_pos=3, random_state=0)
+    stats = engineer.build_query_stats(logs)
+    features = engineer.build_features(logs, stats)
+    assert len(features) == len(logs) * 4
+    negatives = features[features["clicked"] == 0]
+    assert len(negatives) == len(logs) * 3
+    assert set(negatives["clicked_suggestion"]) <= set(stats["query"])
+    # A negative never repeats the suggestion clicked for the same positive row.
+    positives = features[features["clicked"] == 1]
+    clicked_by_query = positives.groupby("query")["clicked_suggestion"].agg(set)
+    for query, suggestion in zip(negatives["query"], negatives["clicked_suggestion"]):
+        if len(clicked_by_query[query]) == 1:
+            assert suggestion not in clicked_by_query[query]
+    assert features["prefix_match_len"].tolist() == [
+        sum(1 for a, b in zip(q, s) if a == b)
+        for q, s in zip(features["query"], features["clicked_suggestion"])
+    ]
+
+
+def test_build_features_empty_stats(logs):
+    engineer = FeatureEngineer(time_decay_days=0, neg_per_pos=3, random_state=0)
+    stats = engineer.build_query_stats(logs.iloc[:0])
+    assert stats.empty
+    features = engineer.build_features(logs, stats)
+    assert len(features) == len(logs)
+    assert (features["clicked"] == 1).all()
+    stat_cols = [f"{side}_{col}" for side in ("clicked", "prefix") for col in stats.columns[1:]]
+    assert stat_cols and (features[stat_cols] == 0).all().all()
+
+
+def test_build_query_stats_chunked_matches_whole_file(tmp_path):
+    rng = np.random.default_rng(0)
+    suggestions = [f"suggestion {i}" for i in range(200)]
+    n = 3000
+    # Chunks see different subsets of suggestions, so their categoricals differ.
+    picks = (np.arange(n) // 40 * 7 + rng.integers(0, 15, n)) % len(suggestions)
+    csv = tmp_path / "click_logs.csv"
+    pd.DataFrame({
+        "query": [f" Su{i % 5} " for i in range(n)],
+        "clicked_suggestion": [suggestions[i].upper() if i % 3 else suggestions[i] for i in picks],
+        "position": rng.integers(1, 10, n),
+        "timestamp": pd.Timestamp(datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }).to_csv(csv, index=False)
+
+    loader = ClickLogsLoader()
+    chunks = list(loader.iter_load(csv, block_size=4096))
+    assert len(chunks) > 10
+    assert sum(map(len, chunks)) == n
+    engineer = FeatureEngineer(time_decay_days=0)
+    whole = engineer.build_query_stats(loader.load(csv)).sort_values("query", ignore_index=True)
+    chunked = engineer.build_query_stats(iter(chunks)).sort_values("query", ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, whole, check_dtype=False, check_categorical=False)
+    assert whole["query_count"].sum() == n
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from autocomplete.pipeline.loader import ClickLogsLoader
+
+HEADER = "query,clicked_suggestion,position,timestamp\n"
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(body: str):
+        path = tmp_path / "click_logs.csv"
+        path.write_text(HEADER + body)
+        return path
+
+    return write
+
+
+def test_load_blank_query_and_suggestion(write_csv):
+    path = write_csv(
+        "Wea ,Weather,1,2026-09-03T02:01:46Z\n"
+        ",weather,2,2026-09-03T02:01:46Z\n"
+        '"  ",weather,2,2026-09-03T02:01:46Z\n'
+        "pyt,,3,2026-09-03T02:01:46Z\n"
+    )
+    df = ClickLogsLoader().load(path)
+    # Blank queries are dropped; a blank suggestion stays missing instead of becoming "".
+    assert df["query"].tolist() == ["wea", "pyt"]
+    assert df["clicked_suggestion"].iloc[0] == "weather"
+    assert pd.isna(df["clicked_suggestion"].iloc[1])
+    assert "" not in df["clicked_suggestion"].cat.categories
+
+
+def test_load_tolerates_malformed_rows(write_csv):
+    path = write_csv(
+        "wea,weather,1,2026-09-03T02:01:46Z\n"
+        "git,github,x,2026-09-03 02:01:46\n"
+        "git,github,2,1700000000\n"
+        "pyt,python,1,not a time\n"
+    )
+    loader = ClickLogsLoader()
+    for df in (loader.load(path), pd.concat(loader.iter_load(path, block_size=64))):
+        # Bad position -> 0; naive and unix timestamps parse as UTC; bad timestamp drops the row.
+        assert df["query"].tolist() == ["wea", "git", "git"]
+        assert df["position"].tolist() == [1, 0, 2]
+        assert df["timestamp"].tolist() == [
+            pd.Timestamp("2026-09-03T02:01:46Z"),
+            pd.Timestamp("2026-09-03T02:01:46Z"),
+            pd.Timestamp(1700000000, unit="s", tz="UTC"),
+        ]
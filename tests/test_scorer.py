@@ -0,0 +1,72 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from autocomplete.scorer import STAT_COLUMNS, load_model, score_candidates, top_k
+from sklearn.linear_model import LogisticRegression
+
+
+class RecordingModel:
+    """Scores each row by its first feature and keeps the last feature block."""
+
+    def predict_proba(self, X):
+        self.X = np.array(X, copy=True)
+        return np.column_stack([1 - X[:, 0], X[:, 0]])
+
+
+COLUMNS = ["query_len", "clicked_query_count", "prefix_query_count"]
+
+
+@pytest.fixture
+def stats():
+    return pd.DataFrame(
+        [[5, 10, 2.0, 0.3], [7, 14, 2.0, 0.3]],
+        index=pd.Index(["weather", "we"], name="query"),
+        columns=STAT_COLUMNS,
+        dtype=np.float32,
+    )
+
+
+def test_score_candidates_empty_stats():
+    model = RecordingModel()
+    empty = pd.DataFrame(columns=STAT_COLUMNS, dtype=np.float32).rename_axis("query")
+    texts, scores = score_candidates(model, COLUMNS, "we", ["weather", "web"], empty)
+    assert texts == ["weather", "web"]
+    assert scores.shape == (2,)
+    assert model.X[:, 1:].tolist() == [[0, 0], [0, 0]]
+
+
+def test_score_candidates_unknown_keys(stats):
+    model = RecordingModel()
+    score_candidates(model, COLUMNS, "we", ["web", "weather"], stats)
+    # Unknown candidate "web" gets zeros; the prefix row is broadcast to every candidate.
+    assert model.X[:, 1].tolist() == [0, 5]
+    assert model.X[:, 2].tolist() == [7, 7]
+    score_candidates(model, COLUMNS, "xyz", ["weather"], stats)
+    assert model.X[:, 1:].tolist() == [[5, 0]]
+
+
+def test_top_k_ties_keep_candidate_order():
+    candidates = [f"c{i}" for i in range(30)]
+    scores = np.full(30, 0.5)
+    scores[29] = 0.9
+    assert [c for c, _ in top_k(candidates, scores, 5)] == ["c29", "c0", "c1", "c2", "c3"]
+    assert top_k(candidates, scores, 0) == []
+    assert len(top_k(candidates, scores, 100)) == 30
+
+
+def test_load_model_memoized_until_mtime_changes(tmp_path):
+    model_path = tmp_path / "model.joblib"
+    X = np.array([[0.0, 1.0], [1.0, 0.0], [0.0, 2.0], [2.0, 0.0]])
+    joblib.dump(LogisticRegression().fit(X, [0, 1, 0, 1]), model_path)
+    (tmp_path / "metadata.yaml").write_text("feature_columns: [a, b]\n")
+    model, cols = load_model(model_path)
+    assert cols == ["a", "b"]
+    assert load_model(model_path)[0] is model
+    st = model_path.stat()
+    os.utime(model_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    reloaded, _ = load_model(model_path)
+    assert reloaded is not model
+    assert load_model(model_path)[0] is reloaded
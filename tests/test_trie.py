@@ -1,9 +1,10 @@
+import time
 from typing import Any
 
-
 import pytest
 from redis import Redis
-from autocomplete.trie import RedisTrie
+from redis.exceptions import ResponseError
+from autocomplete.trie import MmapTrie, RedisTrie
 
 
 @pytest.fixture
@@ -20,3 +21,157 @@ def test_trie_insert_and_search(redis_client):
     assert set[Any](trie.prefix_completions("wea")) == {"weather", "weather london"}
     assert set[Any](trie.prefix_completions("weather")) == {"weather", "weather london"}
     assert trie.prefix_completions("xyz") == []
+
+
+def test_trie_prefix_longer_than_max_prefix_len(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie", max_prefix_len=4)
+    trie.insert_many(["weather london", "weather paris", "weak"])
+    assert not redis_client.exists("test:trie:node:weath")
+    assert set[Any](trie.prefix_completions("weather l")) == {"weather london"}
+    assert set[Any](trie.prefix_completions("weat")) == {"weather london", "weather paris"}
+
+
+def test_trie_completions_ordered_by_score(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie")
+    trie.insert_many(["weather", "weather london", "web"], scores=[5, 20, 1])
+    assert trie.prefix_completions("we", limit=2) == ["weather london", "weather"]
+    trie.insert("web")
+    assert trie.prefix_completions("web") == ["web"]
+    assert redis_client.zscore("test:trie:node:web", "web") == 2
+
+
+def test_trie_export_mmap(redis_client, tmp_path):
+    trie = RedisTrie(redis_client, key_prefix="test:trie", max_prefix_len=4)
+    trie.insert_many(["weather", "weather london", "web", "python"], scores=[5, 20, 1, 2])
+    trie.export_mmap(tmp_path / "trie.bin")
+    snapshot = MmapTrie(tmp_path / "trie.bin")
+    assert snapshot.prefix_completions("we") == ["weather london", "weather", "web"]
+    assert snapshot.prefix_completions("weather l") == ["weather london"]
+    assert snapshot.prefix_completions("xyz") == []
+
+
+def test_trie_local_cache_larger_limit_refetches(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie", local_cache_ttl=60)
+    trie.insert_many(["weather", "web", "west"], scores=[3, 2, 1])
+    assert trie.prefix_completions("we", limit=1) == ["weather"]
+    # Truncated entries cannot answer a larger limit, even when the cache is still fresh.
+    assert trie.prefix_completions("we", limit=3) == ["weather", "web", "west"]
+
+
+def test_trie_local_cache_full_result_answers_any_limit(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie", local_cache_ttl=60)
+    trie.insert_many(["weather", "web"], scores=[2, 1])
+    assert trie.prefix_completions("we", limit=5) == ["weather", "web"]
+    # Fewer results than the limit means the node is exhausted; writes the cache cannot see
+    # prove the next calls are answered locally.
+    redis_client.zadd("test:trie:node:we", {"west": 10})
+    assert trie.prefix_completions("we", limit=50) == ["weather", "web"]
+    assert trie.prefix_completions("we", limit=1) == ["weather"]
+
+
+def test_trie_local_cache_ttl_shows_other_writers(redis_client):
+    reader = RedisTrie(redis_client, key_prefix="test:trie", local_cache_ttl=0.05)
+    writer = RedisTrie(redis_client, key_prefix="test:trie")
+    writer.insert("weather", score=2)
+    assert reader.prefix_completions("we") == ["weather"]
+    writer.insert("web", score=1)
+    assert reader.prefix_completions("we") == ["weather"]
+    time.sleep(0.1)
+    assert reader.prefix_completions("we") == ["weather", "web"]
+
+
+def test_trie_delete_prefix_clears_local_cache(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie", local_cache_ttl=60)
+    trie.insert_many(["weather", "web"], scores=[2, 1])
+    assert trie.prefix_completions("we") == ["weather", "web"]
+    trie.delete_prefix("we")
+    assert trie.prefix_completions("we") == []
+    assert trie.prefix_completions("wea") == ["weather"]
+
+
+def _supports(client, *command) -> bool:
+    try:
+        client.execute_command(*command)
+    except ResponseError:
+        return False
+    return True
+
+
+def _keyspace(client, key_prefix):
+    return {
+        key[len(key_prefix):]: client.zrange(key, 0, -1, withscores=True)
+        for key in client.scan_iter(match=f"{key_prefix}:node:*")
+    }
+
+
+def test_trie_lua_matches_pipeline(redis_client):
+    if not _supports(redis_client, "EVAL", "return 1", 0):
+        pytest.skip("server lacks scripting")
+    words = ["Wéather", "weather london 𝄞", "日本語のテキスト検索エンジン最適化", "web", "", " py "]
+    for key_prefix, use_lua in (("test:lua", True), ("test:pipe", False)):
+        trie = RedisTrie(redis_client, key_prefix=key_prefix, max_prefix_len=8, use_lua=use_lua)
+        trie.insert_many(words, batch_size=4, scores=[5, 20, 3, 1, 9, 2])
+        trie.insert_many(["web", "west"], batch_size=4)
+        assert trie._use_lua is use_lua
+    assert _keyspace(redis_client, "test:lua") == _keyspace(redis_client, "test:pipe") != {}
+
+
+def test_trie_lua_falls_back_to_pipeline(redis_client):
+    trie = RedisTrie(redis_client, key_prefix="test:trie")
+
+    def no_scripting(**kwargs):
+        raise ResponseError("unknown command 'EVALSHA'")
+
+    trie._insert_script = no_scripting
+    trie.insert_many(["weather", "web"], scores=[2, 1])
+    assert trie._use_lua is False
+    assert trie.prefix_completions("we") == ["weather", "web"]
+
+    def broken(**kwargs):
+        raise ResponseError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+    other = RedisTrie(redis_client, key_prefix="test:other")
+    other._insert_script = broken
+    with pytest.raises(ResponseError):
+        other.insert_many(["weather"])
+
+
+def test_trie_skip_seen(redis_client):
+    if not _supports(redis_client, "BF.EXISTS", "test:probe", "x"):
+        pytest.skip("server lacks RedisBloom")
+    trie = RedisTrie(redis_client, key_prefix="test:trie", skip_seen=True)
+    assert trie._skip_seen
+    trie.insert_many(["weather", "Web "])
+    trie.insert_many(["weather", "web", "west"])
+    trie.insert("west")
+    assert redis_client.zscore("test:trie:node:we", "weather") == 1
+    assert redis_client.zscore("test:trie:node:we", "west") == 1
+    # A second instance reuses the existing filter.
+    assert RedisTrie(redis_client, key_prefix="test:trie", skip_seen=True)._skip_seen
+
+
+def test_trie_skip_seen_without_bloom(redis_client, monkeypatch):
+    real = redis_client.execute_command
+
+    def no_bloom(*args, **kwargs):
+        if str(args[0]).upper().startswith("BF."):
+            raise ResponseError(f"unknown command '{args[0]}'")
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(redis_client, "execute_command", no_bloom)
+    trie = RedisTrie(redis_client, key_prefix="test:trie", skip_seen=True)
+    assert trie._skip_seen is False
+    trie.insert_many(["weather"])
+    trie.insert_many(["weather"])
+    assert redis_client.zscore("test:trie:node:we", "weather") == 2
+
+
+def test_trie_clear_removes_legacy_keys(redis_client):
+    redis_client.sadd("test:trie:node:we", "weather")
+    redis_client.sadd("test:trie:children:w", "e")
+    redis_client.set("test:other", "kept")
+    trie = RedisTrie(redis_client, key_prefix="test:trie")
+    assert trie.clear() == 2
+    trie.insert_many(["weather"], scores=[3])
+    assert trie.prefix_completions("we") == ["weather"]
+    assert redis_client.get("test:other") == "kept"